@@ -0,0 +1,70 @@
+"""Composition of several upstream calls into one gateway response.
+
+Parts are fetched concurrently, each with its own timeout. A part that fails
+or times out is reported under "errors" while the others are still returned,
+so one slow service doesn't cost the client the whole screen.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+import httpx
+
+import routing
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PART_TIMEOUT = float(os.getenv("GATEWAY_AGGREGATE_PART_TIMEOUT", "2"))
+# Most blogs whose details one dashboard request may ask for
+MAX_DASHBOARD_BLOGS = int(os.getenv("GATEWAY_DASHBOARD_MAX_BLOGS", "20"))
+
+class Part:
+    """One upstream GET that contributes to an aggregate response"""
+
+    def __init__(self, name: str, pool: str, path: str, params: Optional[dict] = None):
+        self.name = name
+        self.pool = pool
+        self.path = path
+        self.params = params
+
+def _error_detail(response: httpx.Response) -> str:
+    try:
+        return response.json()["detail"]
+    except (ValueError, KeyError, TypeError):
+        return "Upstream error"
+
+async def fetch_part(client: httpx.AsyncClient, part: Part, headers: dict, timeout: float) -> dict:
+    upstream = routing.get_route_table().pool(part.pool).pick()
+    upstream.start()
+    ok = False
+    try:
+        response = await asyncio.wait_for(
+            client.get(f"{upstream.url}{part.path}", headers=headers, params=part.params),
+            timeout=timeout,
+        )
+        ok = response.status_code < 500
+        if response.status_code >= 400:
+            return {"error": _error_detail(response), "status_code": response.status_code}
+        return {"data": response.json()}
+    except asyncio.TimeoutError:
+        return {"error": "Timed out", "status_code": 504}
+    except Exception as e:
+        logger.error(f"Error fetching aggregate part {part.name}: {e}")
+        return {"error": "Upstream unavailable", "status_code": 502}
+    finally:
+        upstream.finish(ok=ok)
+
+async def compose(parts: List[Part], headers: dict, timeout: float = PART_TIMEOUT) -> Dict[str, dict]:
+    """Fetch all parts concurrently and split them into data and errors"""
+    async with routing.upstream_client() as client:
+        results = await asyncio.gather(*(fetch_part(client, part, headers, timeout) for part in parts))
+
+    data, errors = {}, {}
+    for part, result in zip(parts, results):
+        if "data" in result:
+            data[part.name] = result["data"]
+        else:
+            errors[part.name] = result
+    return {"data": data, "errors": errors}
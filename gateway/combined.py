@@ -0,0 +1,89 @@
+"""Single-process "combined" deployment: gateway, accounts and blog in one app.
+
+The accounts and blog apps are imported into this process and every upstream
+call (gateway -> services, blog -> accounts) goes through an in-process ASGI
+transport instead of TCP. The external API is unchanged. Intended for small
+environments, CI and as a zero-network benchmark baseline:
+
+    cd gateway && PYTHONPATH=../services python combined.py
+
+Each service reads its database from ACCOUNTS_DATABASE_URL / BLOG_DATABASE_URL,
+falling back to its usual DATABASE_URL default. Importing this module doesn't
+load the services; create_app() does, and wires up the transports.
+"""
+import importlib
+import logging
+import os
+import sys
+
+import httpx
+from fastapi import FastAPI
+
+import main as gateway_main
+import routing
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SERVICES_DIR = os.path.abspath(
+    os.getenv("COMBINED_SERVICES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services"))
+)
+
+def load_service(name: str, database_url: str = None):
+    """Import a service's main module in isolation and return it.
+
+    Services import their modules by bare name (models, crud, main, ...), so
+    both can't share sys.modules. Each service's modules are imported from its
+    own directory, then moved under "<name>_service.*" so the next service (and
+    the gateway's own main) resolve their own.
+    """
+    service_dir = os.path.join(SERVICES_DIR, name)
+    module_names = [f[:-3] for f in os.listdir(service_dir) if f.endswith(".py") and f != "__init__.py"]
+    saved = {n: sys.modules.pop(n) for n in module_names if n in sys.modules}
+    saved_database_url = os.environ.get("DATABASE_URL")
+
+    sys.path.insert(0, service_dir)
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    try:
+        service_main = importlib.import_module("main")
+    finally:
+        sys.path.remove(service_dir)
+        if database_url:
+            if saved_database_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = saved_database_url
+        for n in module_names:
+            if n in sys.modules:
+                sys.modules[f"{name}_service.{n}"] = sys.modules.pop(n)
+        sys.modules.update(saved)
+    return service_main
+
+def create_app() -> FastAPI:
+    """Load both services and route the gateway's upstream calls to them in-process"""
+    if SERVICES_DIR not in sys.path:
+        # For the shared `common` package
+        sys.path.append(SERVICES_DIR)
+
+    accounts_main = load_service("accounts", os.getenv("ACCOUNTS_DATABASE_URL"))
+    blog_main = load_service("blog", os.getenv("BLOG_DATABASE_URL"))
+
+    # Unhandled errors become 500 responses, as they would over TCP
+    accounts_transport = httpx.ASGITransport(app=accounts_main.app, raise_app_exceptions=False)
+    blog_transport = httpx.ASGITransport(app=blog_main.app, raise_app_exceptions=False)
+
+    transports = {routing.ACCOUNTS_POOL: accounts_transport, routing.BLOG_POOL: blog_transport}
+    for pool_name, pool in routing.get_route_table().pools.items():
+        if pool_name not in transports:
+            logger.warning(f"Pool '{pool_name}' has no in-process service, it will be called over HTTP")
+            continue
+        for upstream in pool.instances:
+            routing.TRANSPORT_MOUNTS[upstream.url] = transports[pool_name]
+    blog_main.UPSTREAM_MOUNTS[blog_main.ACCOUNTS_SERVICE_URL.rstrip("/")] = accounts_transport
+
+    return gateway_main.app
+
+if __name__ == "__main__":
+    from common import launcher
+    launcher.run("combined:create_app", port=8000, factory=True)
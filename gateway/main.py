@@ -1,11 +1,14 @@
-from fastapi import FastAPI, Request, HTTPException, Depends
+from fastapi import FastAPI, Request, HTTPException, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import httpx
 import os
-from typing import Optional
+from typing import List, Optional
 import logging
 
+import aggregates, routing
+from common import forwarding, identity
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,35 +31,62 @@ app.add_middleware(
 # Security
 security = HTTPBearer(auto_error=False)
 
-# Service URLs
-ACCOUNTS_SERVICE_URL = os.getenv("ACCOUNTS_SERVICE_URL", "http://localhost:8001")
-BLOG_SERVICE_URL = os.getenv("BLOG_SERVICE_URL", "http://localhost:8002")
+# Timeouts for proxied requests
+PROXY_TIMEOUT = float(os.getenv("GATEWAY_PROXY_TIMEOUT", "5"))
+# Long-polling endpoints -> the query parameter saying how long they may hold
+# the request, which extends the read timeout
+LONG_POLL_ROUTES = {"/blogs/changes": "wait"}
+MAX_LONG_POLL_SECONDS = 60
+
+def long_poll_seconds(request: Request) -> Optional[float]:
+    """How long the upstream may legitimately hold this request, None if it isn't a long-poll"""
+    param = LONG_POLL_ROUTES.get(request.url.path.rstrip("/"))
+    if param is None:
+        return None
+    try:
+        wait = float(request.query_params.get(param, 0))
+    except ValueError:
+        return 0.0
+    return min(max(wait, 0.0), MAX_LONG_POLL_SECONDS)
 
 async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     """Validate JWT token with accounts service"""
     if not credentials:
         return None
     
+    accounts = routing.get_route_table().pool(routing.ACCOUNTS_POOL).pick()
+    accounts.start()
+    ok = False
     try:
-        async with httpx.AsyncClient() as client:
+        async with routing.upstream_client() as client:
             response = await client.get(
-                f"{ACCOUNTS_SERVICE_URL}/auth/verify",
+                f"{accounts.url}/auth/verify",
                 headers={"Authorization": f"Bearer {credentials.credentials}"}
             )
+            ok = response.status_code < 500
             if response.status_code == 200:
                 return response.json()
             return None
     except Exception as e:
         logger.error(f"Error validating token: {e}")
         return None
+    finally:
+        accounts.finish(ok=ok)
 
-async def proxy_request(request: Request, service_url: str, path: str):
-    """Proxy request to the appropriate microservice"""
+async def proxy_request(request: Request, service_url: str, path: str, wait: float = 0.0):
+    """Proxy request to the appropriate microservice, allowing `wait` extra seconds for the response"""
     try:
-        async with httpx.AsyncClient() as client:
+        async with routing.upstream_client() as client:
             # Prepare headers
             headers = dict(request.headers)
             headers.pop("host", None)  # Remove host header
+            headers.pop(identity.HEADER.lower(), None)  # Only the gateway may assert identity
+            # Pass on the client address for services that throttle per IP,
+            # replacing whatever an untrusted client put in the header
+            headers[forwarding.HEADER.lower()] = forwarding.client_ip(request)
+            forwarded_for = headers.get("x-forwarded-for")
+            client_host = request.client.host if request.client else "unknown"
+            headers["x-forwarded-for"] = f"{forwarded_for}, {client_host}" if forwarded_for else client_host
             
             # Get request body
             body = await request.body()
@@ -67,7 +97,8 @@ async def proxy_request(request: Request, service_url: str, path: str):
                 url=f"{service_url}{path}",
                 headers=headers,
                 content=body,
-                params=request.query_params
+                params=request.query_params,
+                timeout=httpx.Timeout(PROXY_TIMEOUT, read=PROXY_TIMEOUT + wait),
             )
             
             return {
@@ -75,6 +106,9 @@ async def proxy_request(request: Request, service_url: str, path: str):
                 "content": response.content,
                 "headers": dict(response.headers)
             }
+    except httpx.TimeoutException as e:
+        logger.error(f"Timed out proxying request to {service_url}{path}: {e}")
+        raise HTTPException(status_code=504, detail="Upstream timed out") from e
     except Exception as e:
         logger.error(f"Error proxying request: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -87,45 +121,89 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     try:
-        # Check accounts service
-        async with httpx.AsyncClient() as client:
-            accounts_response = await client.get(f"{ACCOUNTS_SERVICE_URL}/health", timeout=5.0)
-            blog_response = await client.get(f"{BLOG_SERVICE_URL}/health", timeout=5.0)
+        # Check one instance of each upstream pool
+        services = {}
+        async with routing.upstream_client() as client:
+            for name, pool in routing.get_route_table().pools.items():
+                upstream = pool.pick()
+                upstream.start()
+                ok = False
+                try:
+                    response = await client.get(f"{upstream.url}/health", timeout=5.0)
+                    ok = response.status_code < 500
+                finally:
+                    upstream.finish(ok=ok)
+                services[name] = response.status_code == 200
             
         return {
             "status": "healthy",
-            "services": {
-                "accounts": accounts_response.status_code == 200,
-                "blog": blog_response.status_code == 200
-            }
+            "services": services
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "error": str(e)}
 
-# Auth routes (proxy to accounts service)
-@app.api_route("/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def auth_proxy(request: Request, path: str):
-    result = await proxy_request(request, ACCOUNTS_SERVICE_URL, f"/auth/{path}")
-    return result["content"]
-
-# Users routes (proxy to accounts service)
-@app.api_route("/users/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def users_proxy(request: Request, path: str):
-    result = await proxy_request(request, ACCOUNTS_SERVICE_URL, f"/users/{path}")
-    return result["content"]
-
-# Blog routes (proxy to blog service)
-@app.api_route("/blogs/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def blogs_proxy(request: Request, path: str):
-    result = await proxy_request(request, BLOG_SERVICE_URL, f"/blogs/{path}")
-    return result["content"]
-
-@app.api_route("/blogs", methods=["GET", "POST"])
-async def blogs_root_proxy(request: Request):
-    result = await proxy_request(request, BLOG_SERVICE_URL, "/blogs")
-    return result["content"]
+# Aggregate endpoints (compose several upstream calls into one response)
+@app.get("/aggregates/dashboard")
+async def dashboard(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    blog_ids: List[int] = Query(default=[], max_length=aggregates.MAX_DASHBOARD_BLOGS),
+    current_user: Optional[dict] = Depends(get_current_user),
+):
+    """Current user, blog list and selected blog details in one round trip"""
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    parts = [
+        aggregates.Part("me", routing.ACCOUNTS_POOL, "/users/me"),
+        aggregates.Part("blogs", routing.BLOG_POOL, "/blogs/", {"skip": skip, "limit": limit}),
+    ]
+    if blog_ids:
+        parts.append(aggregates.Part("blog_details", routing.BLOG_POOL, "/blogs/", {"ids": blog_ids}))
+
+    # The token is verified once, here; services trust the signed identity instead
+    headers = {
+        "Authorization": request.headers["authorization"],
+        identity.HEADER: identity.sign(current_user),
+    }
+    result = await aggregates.compose(parts, headers)
+    if not result["data"]:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=result["errors"])
+    return result
+
+# Proxy routes, resolved through the route table (auth, users, blogs, ...)
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def gateway_proxy(request: Request, path: str):
+    pool = routing.get_route_table().match(request.url.path)
+    if pool is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    wait = long_poll_seconds(request)
+    upstream = pool.pick()
+    upstream.start()
+    # None (a cancelled request) releases the instance without judging its health
+    ok = None
+    try:
+        result = await proxy_request(request, upstream.url, request.url.path, wait=wait or 0.0)
+        ok = result["status_code"] < 500
+        return result["content"]
+    except HTTPException as e:
+        # An idle long-poll running out of time says nothing about the instance's
+        # health; connect and pool timeouts, or any timeout without a wait, do
+        ok = bool(wait) and isinstance(e.__cause__, httpx.ReadTimeout)
+        raise
+    except Exception:
+        ok = False
+        raise
+    finally:
+        upstream.finish(ok=ok)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from common import launcher
+    launcher.run("main:app", port=8000)
@@ -0,0 +1,178 @@
+"""Config-driven routing from path prefixes to pools of upstream instances.
+
+The route table is read from GATEWAY_ROUTES_FILE (JSON) when set:
+
+    {
+        "pools": {
+            "accounts": ["http://accounts-1:8001", "http://accounts-2:8001"],
+            "blog": ["http://blog-1:8002"]
+        },
+        "routes": {"/auth": "accounts", "/users": "accounts", "/blogs": "blog"}
+    }
+
+Otherwise it is built from ACCOUNTS_SERVICE_URL and BLOG_SERVICE_URL, which
+may hold a comma-separated list of instances. The file is checked for changes
+every GATEWAY_ROUTES_RELOAD_INTERVAL seconds and reloaded without a restart.
+"""
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ACCOUNTS_SERVICE_URL = os.getenv("ACCOUNTS_SERVICE_URL", "http://localhost:8001")
+BLOG_SERVICE_URL = os.getenv("BLOG_SERVICE_URL", "http://localhost:8002")
+ROUTES_FILE = os.getenv("GATEWAY_ROUTES_FILE")
+RELOAD_INTERVAL = float(os.getenv("GATEWAY_ROUTES_RELOAD_INTERVAL", "5"))
+# Passive health checking: eject an instance after this many consecutive failures
+EJECT_AFTER_FAILURES = int(os.getenv("GATEWAY_EJECT_AFTER_FAILURES", "3"))
+EJECT_SECONDS = float(os.getenv("GATEWAY_EJECT_SECONDS", "30"))
+
+ACCOUNTS_POOL = "accounts"
+BLOG_POOL = "blog"
+
+# Upstream URL -> transport overrides; combined mode routes upstreams in-process
+TRANSPORT_MOUNTS: Dict[str, httpx.AsyncBaseTransport] = {}
+
+def upstream_client(**kwargs) -> httpx.AsyncClient:
+    """HTTP client for calls to upstream services"""
+    return httpx.AsyncClient(mounts=TRANSPORT_MOUNTS, **kwargs)
+
+class Upstream:
+    """A single upstream instance and its load/health state"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def start(self):
+        self.outstanding += 1
+
+    def finish(self, ok: Optional[bool]):
+        """End a request; ok=None when its outcome says nothing about health (e.g. cancelled)"""
+        self.outstanding -= 1
+        if ok is None:
+            return
+        if ok:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures >= EJECT_AFTER_FAILURES:
+            self.ejected_until = time.monotonic() + EJECT_SECONDS
+            self.failures = 0
+            logger.warning(f"Ejecting upstream {self.url} for {EJECT_SECONDS}s")
+
+class Pool:
+    """Instances serving the same service, balanced by least outstanding requests"""
+
+    def __init__(self, name: str, instances: List[Upstream]):
+        self.name = name
+        self.instances = instances
+
+    def pick(self) -> Upstream:
+        now = time.monotonic()
+        candidates = [u for u in self.instances if u.is_available(now)]
+        if not candidates:
+            # Every instance is ejected; trying one beats failing outright
+            candidates = self.instances
+        if len(candidates) == 1:
+            return candidates[0]
+        # Power of two choices: compare two random instances rather than
+        # scanning the whole pool, which avoids herding onto one instance
+        first, second = random.sample(candidates, 2)
+        return first if first.outstanding <= second.outstanding else second
+
+class RouteTable:
+    def __init__(self, pools: Dict[str, Pool], routes: Dict[str, str]):
+        self.pools = pools
+        # Longest prefix first so more specific routes win
+        self.routes = sorted(
+            ((prefix.rstrip("/"), pools[name]) for prefix, name in routes.items()),
+            key=lambda route: len(route[0]),
+            reverse=True,
+        )
+
+    def pool(self, name: str) -> Optional[Pool]:
+        return self.pools.get(name)
+
+    def match(self, path: str) -> Optional[Pool]:
+        for prefix, pool in self.routes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return pool
+        return None
+
+def _split_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+def default_config() -> dict:
+    return {
+        "pools": {
+            ACCOUNTS_POOL: _split_urls(ACCOUNTS_SERVICE_URL),
+            BLOG_POOL: _split_urls(BLOG_SERVICE_URL),
+        },
+        "routes": {"/auth": ACCOUNTS_POOL, "/users": ACCOUNTS_POOL, "/blogs": BLOG_POOL},
+    }
+
+def build_route_table(config: dict, previous: Optional[RouteTable] = None) -> RouteTable:
+    """Build a route table, keeping the load/health state of instances that remain"""
+    existing: Dict[str, Upstream] = {}
+    if previous is not None:
+        for pool in previous.pools.values():
+            for upstream in pool.instances:
+                existing[upstream.url] = upstream
+
+    pools = {}
+    for name, urls in config["pools"].items():
+        if not urls:
+            raise ValueError(f"Pool '{name}' has no instances")
+        pools[name] = Pool(name, [existing.get(url.rstrip("/")) or Upstream(url) for url in urls])
+
+    routes = config["routes"]
+    for prefix, name in routes.items():
+        if name not in pools:
+            raise ValueError(f"Route '{prefix}' references unknown pool '{name}'")
+    return RouteTable(pools, routes)
+
+_route_table: Optional[RouteTable] = None
+_routes_mtime: Optional[float] = None
+_last_check = 0.0
+
+def _load_routes_file() -> dict:
+    with open(ROUTES_FILE) as f:
+        return json.load(f)
+
+def get_route_table() -> RouteTable:
+    """Return the current route table, reloading the routes file if it changed"""
+    global _route_table, _routes_mtime, _last_check
+
+    if _route_table is None:
+        _route_table = build_route_table(_load_routes_file() if ROUTES_FILE else default_config())
+        if ROUTES_FILE:
+            _routes_mtime = os.path.getmtime(ROUTES_FILE)
+        _last_check = time.monotonic()
+        return _route_table
+
+    now = time.monotonic()
+    if ROUTES_FILE and now - _last_check >= RELOAD_INTERVAL:
+        _last_check = now
+        try:
+            mtime = os.path.getmtime(ROUTES_FILE)
+            if mtime != _routes_mtime:
+                _route_table = build_route_table(_load_routes_file(), previous=_route_table)
+                _routes_mtime = mtime
+                logger.info(f"Reloaded gateway routes from {ROUTES_FILE}")
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving with the last good table
+            logger.error(f"Failed to reload gateway routes: {e}")
+    return _route_table
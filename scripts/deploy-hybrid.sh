@@ -26,7 +26,7 @@ kubectl wait --namespace ingress-nginx \
 
 # Convert ingress controller to NodePort for Kind compatibility
 echo "🔧 Configuring ingress controller for Kind..."
-kubectl patch svc ingress-nginx-controller -n ingress-nginx -p '{"spec":{"type":"NodePort","ports":[{"port":80,"targetPort":80,"nodePort":30080},{"port":443,"targetPort":443,"nodePort":30443}]}}'
+kubectl patch svc ingress-nginx-controller -n ingress-nginx -p '{"spec":{"type":"NodePort","externalTrafficPolicy":"Local","ports":[{"port":80,"targetPort":80,"nodePort":30080},{"port":443,"targetPort":443,"nodePort":30443}]}}'
 
 # Create hybrid service configurations (both ClusterIP for ingress and NodePort for direct access)
 echo "📋 Creating hybrid service configurations..."
@@ -55,6 +55,8 @@ spec:
     targetPort: 8000
     nodePort: 30000
   type: NodePort
+  # Keep the client's address instead of SNATing it to the node's
+  externalTrafficPolicy: Local
 ---
 apiVersion: v1
 kind: Service
@@ -69,6 +71,8 @@ spec:
     targetPort: 8001
     nodePort: 30001
   type: NodePort
+  # Keep the client's address instead of SNATing it to the node's
+  externalTrafficPolicy: Local
 ---
 apiVersion: v1
 kind: Service
@@ -83,6 +87,8 @@ spec:
     targetPort: 8002
     nodePort: 30002
   type: NodePort
+  # Keep the client's address instead of SNATing it to the node's
+  externalTrafficPolicy: Local
 EOF
 
 # Apply ingress configuration
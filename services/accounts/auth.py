@@ -13,6 +13,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified against when the email is unknown, so those logins cost the same
+# bcrypt work as real ones and response time doesn't reveal which emails exist
+DUMMY_PASSWORD_HASH = pwd_context.hash("dummy-password-for-unknown-users")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -22,6 +26,7 @@ def get_password_hash(password: str) -> str:
 def authenticate_user(db: Session, email: str, password: str):
     user = crud.get_user_by_email(db, email)
     if not user:
+        verify_password(password, DUMMY_PASSWORD_HASH)
         return False
     if not verify_password(password, user.hashed_password):
         return False
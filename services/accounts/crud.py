@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-import models, schemas, auth
+import models, schemas, auth, tasks
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -32,6 +32,7 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
         for key, value in update_data.items():
             setattr(db_user, key, value)
         
+        tasks.user_changed_on_commit(db, db_user.id)
         db.commit()
         db.refresh(db_user)
     return db_user
@@ -40,5 +41,6 @@ def delete_user(db: Session, user_id: int):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
         db.delete(db_user)
+        tasks.user_changed_on_commit(db, db_user.id)
         db.commit()
     return db_user
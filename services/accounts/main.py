@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
@@ -6,7 +6,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 import os
 
-import models, schemas, crud, auth
+import models, schemas, crud, auth, throttle
+from common import forwarding
 from database import SessionLocal, engine
 
 # Create tables
@@ -72,14 +73,25 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return crud.create_user(db=db, user=user)
 
 @app.post("/auth/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+def login(user_credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
+    # Reject locked identities before any DB lookup or bcrypt work
+    ip = forwarding.client_ip(request)
+    retry_after = throttle.locked_for(user_credentials.email, ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
     user = auth.authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
+        throttle.record_failure(user_credentials.email, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    throttle.record_success(user_credentials.email)
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -131,5 +143,5 @@ def read_users(
     return users
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    from common import launcher
+    launcher.run("main:app", port=8001)
@@ -0,0 +1,17 @@
+# Accounts Service
+"""Background jobs run after user writes commit"""
+import logging
+
+from common import jobs
+
+logger = logging.getLogger(__name__)
+
+QUEUE = "accounts"
+
+@jobs.job("user.changed", queue=QUEUE)
+def user_changed(user_id: int):
+    """Record a user update or deletion in the log; nothing else reacts to it yet"""
+    logger.info(f"User {user_id} changed")
+
+def user_changed_on_commit(db, user_id: int):
+    jobs.on_commit(db, "user.changed", {"user_id": user_id}, idempotency_key=f"user.changed:{user_id}")
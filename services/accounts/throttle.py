@@ -0,0 +1,151 @@
+# Accounts Service
+"""Failed-login throttling per email and per client IP.
+
+Failures are counted in a sliding window. Reaching the limit locks the
+identity, and every further lockout within LOCKOUT_MEMORY_SECONDS doubles
+its length. State lives in Redis so all replicas share it, with an
+in-process fallback when Redis is unavailable.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import redis
+
+from common.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", "300"))
+MAX_FAILURES_PER_EMAIL = int(os.getenv("LOGIN_THROTTLE_MAX_FAILURES_PER_EMAIL", "5"))
+MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_THROTTLE_MAX_FAILURES_PER_IP", "20"))
+LOCKOUT_BASE_SECONDS = int(os.getenv("LOGIN_THROTTLE_LOCKOUT_BASE_SECONDS", "30"))
+LOCKOUT_MAX_SECONDS = int(os.getenv("LOGIN_THROTTLE_LOCKOUT_MAX_SECONDS", "3600"))
+LOCKOUT_MEMORY_SECONDS = int(os.getenv("LOGIN_THROTTLE_LOCKOUT_MEMORY_SECONDS", "86400"))
+
+KEY_PREFIX = "login-throttle"
+LOCAL_MAX_IDENTITIES = 10000
+
+def _identities(email: str, ip: str) -> Tuple[Tuple[str, int], Tuple[str, int]]:
+    return (f"email:{email.lower()}", MAX_FAILURES_PER_EMAIL), (f"ip:{ip}", MAX_FAILURES_PER_IP)
+
+def lockout_seconds(strikes: int) -> int:
+    return min(LOCKOUT_BASE_SECONDS * (2 ** (strikes - 1)), LOCKOUT_MAX_SECONDS)
+
+class RedisBackend:
+    def __init__(self, r: redis.Redis):
+        self.r = r
+
+    def locked_for(self, identity: str) -> int:
+        ttl = self.r.ttl(f"{KEY_PREFIX}:lock:{identity}")
+        return max(ttl, 0)
+
+    def record_failure(self, identity: str, limit: int):
+        now = time.time()
+        failures_key = f"{KEY_PREFIX}:failures:{identity}"
+        pipe = self.r.pipeline()
+        pipe.zadd(failures_key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+        pipe.zremrangebyscore(failures_key, 0, now - WINDOW_SECONDS)
+        pipe.zcard(failures_key)
+        pipe.expire(failures_key, WINDOW_SECONDS)
+        count = pipe.execute()[2]
+        if count < limit:
+            return
+
+        strikes_key = f"{KEY_PREFIX}:strikes:{identity}"
+        pipe = self.r.pipeline()
+        pipe.incr(strikes_key)
+        pipe.expire(strikes_key, LOCKOUT_MEMORY_SECONDS)
+        strikes = pipe.execute()[0]
+        duration = lockout_seconds(strikes)
+        pipe = self.r.pipeline()
+        pipe.set(f"{KEY_PREFIX}:lock:{identity}", 1, ex=duration)
+        pipe.delete(failures_key)
+        pipe.execute()
+        logger.warning(f"Locking {identity} for {duration}s after {count} failed logins")
+
+    def reset(self, identity: str):
+        self.r.delete(f"{KEY_PREFIX}:failures:{identity}", f"{KEY_PREFIX}:strikes:{identity}")
+
+class LocalBackend:
+    """In-process fallback; state is per process and lost on restart"""
+
+    def __init__(self):
+        self.failures: Dict[str, Deque[float]] = {}
+        self.locks: Dict[str, float] = {}
+        self.strikes: Dict[str, Tuple[int, float]] = {}
+        self.lock = threading.Lock()
+
+    def locked_for(self, identity: str) -> int:
+        with self.lock:
+            until = self.locks.get(identity)
+            if until is None:
+                return 0
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                del self.locks[identity]
+                return 0
+            return int(remaining) + 1
+
+    def _prune(self, now: float):
+        """Drop expired state so an attack from many identities can't grow memory forever"""
+        self.failures = {k: v for k, v in self.failures.items() if v and v[-1] > now - WINDOW_SECONDS}
+        self.locks = {k: v for k, v in self.locks.items() if v > now}
+        self.strikes = {k: v for k, v in self.strikes.items() if v[1] > now}
+
+    def record_failure(self, identity: str, limit: int):
+        now = time.monotonic()
+        with self.lock:
+            if len(self.failures) > LOCAL_MAX_IDENTITIES:
+                self._prune(now)
+            failures = self.failures.setdefault(identity, deque())
+            failures.append(now)
+            while failures and failures[0] <= now - WINDOW_SECONDS:
+                failures.popleft()
+            count = len(failures)
+            if count < limit:
+                return
+
+            strikes, expires = self.strikes.get(identity, (0, 0.0))
+            strikes = strikes + 1 if expires > now else 1
+            self.strikes[identity] = (strikes, now + LOCKOUT_MEMORY_SECONDS)
+            duration = lockout_seconds(strikes)
+            self.locks[identity] = now + duration
+            del self.failures[identity]
+        logger.warning(f"Locking {identity} for {duration}s after {count} failed logins")
+
+    def reset(self, identity: str):
+        with self.lock:
+            self.failures.pop(identity, None)
+            self.strikes.pop(identity, None)
+
+_local = LocalBackend()
+
+def _backend():
+    r = get_redis()
+    return RedisBackend(r) if r is not None else _local
+
+def _call(method: str, *args):
+    try:
+        return getattr(_backend(), method)(*args)
+    except redis.RedisError as e:
+        logger.warning(f"Login throttle falling back to in-process state: {e}")
+        return getattr(_local, method)(*args)
+
+def locked_for(email: str, ip: str) -> Optional[int]:
+    """Seconds until the email or IP may try again, or None if neither is locked"""
+    retry_after = max(_call("locked_for", identity) for identity, _ in _identities(email, ip))
+    return retry_after or None
+
+def record_failure(email: str, ip: str):
+    for identity, limit in _identities(email, ip):
+        _call("record_failure", identity, limit)
+
+def record_success(email: str):
+    """Forget past failures for the email; the IP keeps its count"""
+    _call("reset", f"email:{email.lower()}")
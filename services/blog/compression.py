@@ -0,0 +1,49 @@
+# Blog Service
+import logging
+import os
+import zlib
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Configuration
+# "none" keeps content as plain text, "zlib" or "zstd" compress large content at rest
+CONTENT_COMPRESSION = os.getenv("BLOG_CONTENT_COMPRESSION", "none").lower()
+CONTENT_COMPRESSION_THRESHOLD = int(os.getenv("BLOG_CONTENT_COMPRESSION_THRESHOLD", "4096"))
+CONTENT_COMPRESSION_LEVEL = int(os.getenv("BLOG_CONTENT_COMPRESSION_LEVEL", "6"))
+
+if CONTENT_COMPRESSION == "zstd" and zstandard is None:
+    logger.warning("zstandard is not installed, falling back to zlib for blog content")
+    CONTENT_COMPRESSION = "zlib"
+
+def compress(text: str) -> Tuple[Optional[str], Optional[bytes], Optional[str]]:
+    """Return (plain, compressed, codec) for storing text in the blogs table.
+
+    Content below the threshold, or when compression is disabled, is kept as
+    plain text so small posts stay readable and cheap to load.
+    """
+    data = text.encode("utf-8")
+    if CONTENT_COMPRESSION not in ("zlib", "zstd") or len(data) < CONTENT_COMPRESSION_THRESHOLD:
+        return text, None, None
+    if CONTENT_COMPRESSION == "zstd":
+        compressed = zstandard.ZstdCompressor(level=CONTENT_COMPRESSION_LEVEL).compress(data)
+    else:
+        compressed = zlib.compress(data, CONTENT_COMPRESSION_LEVEL)
+    # Not worth storing compressed if it doesn't actually shrink
+    if len(compressed) >= len(data):
+        return text, None, None
+    return None, compressed, CONTENT_COMPRESSION
+
+def decompress(data: bytes, codec: str) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed blog content")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown blog content codec: {codec}")
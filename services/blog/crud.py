@@ -1,12 +1,18 @@
+from sqlalchemy import func, insert, select, tuple_
 from sqlalchemy.orm import Session
-from datetime import datetime
-import models, schemas
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import base64
+import models, schemas, tasks
 
 def get_blog(db: Session, blog_id: int):
     return db.query(models.Blog).filter(models.Blog.id == blog_id).first()
 
-def get_blogs(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Blog).offset(skip).limit(limit).all()
+def get_blogs(db: Session, skip: int = 0, limit: int = 100, ids: Optional[List[int]] = None):
+    query = db.query(models.Blog)
+    if ids is not None:
+        query = query.filter(models.Blog.id.in_(ids))
+    return query.offset(skip).limit(limit).all()
 
 def get_published_blogs(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Blog).filter(
@@ -29,6 +35,8 @@ def create_blog(db: Session, blog: schemas.BlogCreate, author_id: int):
         published_at=datetime.utcnow() if blog.is_published else None
     )
     db.add(db_blog)
+    db.flush()
+    tasks.blog_changed_on_commit(db, db_blog.id)
     db.commit()
     db.refresh(db_blog)
     return db_blog
@@ -48,6 +56,7 @@ def update_blog(db: Session, blog_id: int, blog_update: schemas.BlogUpdate):
         for key, value in update_data.items():
             setattr(db_blog, key, value)
         
+        tasks.blog_changed_on_commit(db, db_blog.id)
         db.commit()
         db.refresh(db_blog)
     return db_blog
@@ -56,5 +65,101 @@ def delete_blog(db: Session, blog_id: int):
     db_blog = db.query(models.Blog).filter(models.Blog.id == blog_id).first()
     if db_blog:
         db.delete(db_blog)
+        db.add(models.BlogTombstone(blog_id=db_blog.id))
+        tasks.blog_changed_on_commit(db, db_blog.id)
         db.commit()
     return db_blog
+
+BATCH_STATUS = {"publish": "published", "unpublish": "unpublished", "delete": "deleted"}
+
+def batch_update_blogs(db: Session, blog_ids: list[int], action: str):
+    """Publish, unpublish or delete many blogs with set-based statements in one transaction.
+
+    Returns (blog_id, status) per requested id, in request order.
+    """
+    blog_ids = list(dict.fromkeys(blog_ids))
+    existing = dict(
+        db.query(models.Blog.id, models.Blog.is_published)
+        .filter(models.Blog.id.in_(blog_ids))
+        .with_for_update()
+        .all()
+    )
+
+    if action == "publish":
+        targets = [blog_id for blog_id, is_published in existing.items() if not is_published]
+        values = {"is_published": True, "published_at": datetime.utcnow(), "updated_at": func.now()}
+    elif action == "unpublish":
+        targets = [blog_id for blog_id, is_published in existing.items() if is_published]
+        values = {"is_published": False, "published_at": None, "updated_at": func.now()}
+    else:
+        targets = list(existing)
+        values = None
+
+    if targets:
+        query = db.query(models.Blog).filter(models.Blog.id.in_(targets))
+        if values is None:
+            query.delete(synchronize_session=False)
+            db.execute(insert(models.BlogTombstone), [{"blog_id": blog_id} for blog_id in targets])
+        else:
+            query.update(values, synchronize_session=False)
+        tasks.blogs_changed_on_commit(db, targets)
+    db.commit()
+
+    changed = set(targets)
+    results = []
+    for blog_id in blog_ids:
+        if blog_id not in existing:
+            results.append((blog_id, "not_found"))
+        elif blog_id in changed:
+            results.append((blog_id, BATCH_STATUS[action]))
+        else:
+            results.append((blog_id, "unchanged"))
+    return results
+
+# Change feed
+
+def encode_cursor(changed_at: datetime, blog_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{changed_at.isoformat()}|{blog_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a malformed cursor"""
+    try:
+        changed_at, blog_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(changed_at), int(blog_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_changes(
+    db: Session,
+    since: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+    settle_seconds: float = 0,
+):
+    """Blogs changed and deleted after `since`, ordered by (changed_at, id).
+
+    Returns a list of (changed_at, blog_id, blog) where blog is None for deletes.
+    Both queries walk a (timestamp, id) index, so the cost scales with the number
+    of changes rather than the number of blogs.
+
+    Timestamps come from now(), the start of the writing transaction, so a write
+    can commit after a later one has been read. Changes newer than
+    `settle_seconds` are held back until such writes are visible, so the cursor
+    never moves past them.
+    """
+    settled_before = db.scalar(select(func.now())) - timedelta(seconds=settle_seconds)
+    blogs = db.query(models.Blog).filter(models.Blog.updated_at <= settled_before)
+    tombstones = db.query(models.BlogTombstone).filter(models.BlogTombstone.deleted_at <= settled_before)
+    if since is not None:
+        blogs = blogs.filter(tuple_(models.Blog.updated_at, models.Blog.id) > since)
+        tombstones = tombstones.filter(
+            tuple_(models.BlogTombstone.deleted_at, models.BlogTombstone.blog_id) > since
+        )
+    blogs = blogs.order_by(models.Blog.updated_at, models.Blog.id).limit(limit).all()
+    tombstones = tombstones.order_by(
+        models.BlogTombstone.deleted_at, models.BlogTombstone.blog_id
+    ).limit(limit).all()
+
+    changes = [(blog.updated_at, blog.id, blog) for blog in blogs]
+    changes += [(tombstone.deleted_at, tombstone.blog_id, None) for tombstone in tombstones]
+    changes.sort(key=lambda change: (change[0], change[1]))
+    return changes[:limit]
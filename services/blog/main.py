@@ -1,16 +1,21 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+import asyncio
 import httpx
 import os
 from typing import Optional
 
-import models, schemas, crud
+import models, schemas, crud, migrate
+from common import identity
 from database import SessionLocal, engine
 
 # Create tables
 models.Base.metadata.create_all(bind=engine)
+# Every query selects the compression columns, so they must exist before serving
+migrate.add_compression_columns(engine)
 
 app = FastAPI(
     title="Blog Service",
@@ -29,6 +34,13 @@ app.add_middleware(
 security = HTTPBearer()
 
 ACCOUNTS_SERVICE_URL = os.getenv("ACCOUNTS_SERVICE_URL", "http://localhost:8001")
+# URL -> transport overrides; combined mode calls accounts in-process
+UPSTREAM_MOUNTS = {}
+# How often a long-polling change feed request re-checks for changes
+CHANGES_POLL_INTERVAL = float(os.getenv("BLOG_CHANGES_POLL_INTERVAL", "1"))
+# Changes are only returned once they are this old; must exceed the longest
+# blog write transaction, or a slow commit can land behind a client's cursor
+CHANGES_SETTLE_SECONDS = float(os.getenv("BLOG_CHANGES_SETTLE_SECONDS", "2"))
 
 # Dependency
 def get_db():
@@ -38,10 +50,16 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify user with accounts service"""
+async def get_current_user(
+    token: HTTPAuthorizationCredentials = Depends(security),
+    verified_user: Optional[str] = Header(default=None, alias=identity.HEADER),
+):
+    """Verify user with accounts service, unless the gateway already has"""
+    user_data = identity.verify(verified_user)
+    if user_data is not None:
+        return user_data
     try:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(mounts=UPSTREAM_MOUNTS) as client:
             response = await client.get(
                 f"{ACCOUNTS_SERVICE_URL}/auth/verify",
                 headers={"Authorization": f"Bearer {token.credentials}"}
@@ -84,10 +102,11 @@ async def health_check():
 def read_blogs(
     skip: int = 0,
     limit: int = 100,
+    ids: list[int] = Query(default=[], max_length=100),
     current_user: dict = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    blogs = crud.get_blogs(db, skip=skip, limit=limit)
+    blogs = crud.get_blogs(db, skip=skip, limit=limit, ids=ids or None)
     return blogs
 
 @app.post("/blogs/", response_model=schemas.Blog)
@@ -98,6 +117,60 @@ def create_blog(
 ):
     return crud.create_blog(db=db, blog=blog, author_id=current_user["id"])
 
+@app.post("/blogs/batch", response_model=schemas.BlogBatchResponse)
+def batch_blogs(
+    batch: schemas.BlogBatchAction,
+    current_user: dict = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Publish, unpublish or delete many blogs in a single transaction"""
+    results = crud.batch_update_blogs(db=db, blog_ids=batch.ids, action=batch.action)
+    return {"results": [{"id": blog_id, "status": result} for blog_id, result in results]}
+
+@app.get("/blogs/changes", response_model=schemas.BlogChanges)
+async def read_blog_changes(
+    since: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    wait: int = Query(default=0, ge=0, le=60),
+    current_user: dict = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Blogs created, updated, published or deleted after the `since` cursor.
+
+    With `wait`, the request is held for up to that many seconds until a
+    change arrives (long-polling) instead of returning an empty page.
+    """
+    try:
+        cursor = crud.decode_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    deadline = asyncio.get_running_loop().time() + wait
+    while True:
+        changes = await run_in_threadpool(
+            crud.get_changes, db, since=cursor, limit=limit, settle_seconds=CHANGES_SETTLE_SECONDS
+        )
+        # Give the connection back to the pool while waiting
+        db.close()
+        if changes or asyncio.get_running_loop().time() >= deadline:
+            break
+        await asyncio.sleep(CHANGES_POLL_INTERVAL)
+
+    if changes:
+        since = crud.encode_cursor(changes[-1][0], changes[-1][1])
+    return {
+        "changes": [
+            {
+                "id": blog_id,
+                "op": "delete" if blog is None else "upsert",
+                "changed_at": changed_at,
+                "blog": blog,
+            }
+            for changed_at, blog_id, blog in changes
+        ],
+        "cursor": since,
+    }
+
 @app.get("/blogs/{blog_id}", response_model=schemas.Blog)
 def read_blog(
     blog_id: int,
@@ -152,5 +225,5 @@ def read_public_blog(blog_id: int, db: Session = Depends(get_db)):
     return db_blog
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    from common import launcher
+    launcher.run("main:app", port=8002)
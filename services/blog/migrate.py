@@ -0,0 +1,146 @@
+# Blog Service
+"""Schema and data migrations for the blog database.
+
+create_all() only creates missing tables, so changes to the existing blogs
+table are applied here. The columns the models select are added by the
+service itself at startup (add_compression_columns). The change feed index,
+updated_at backfill and content (re)compression are slower and run offline,
+once per deploy that needs them, from the service directory:
+
+    python migrate.py [--batch-size 500] [--decompress]
+"""
+import argparse
+import logging
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+import compression, models
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+blogs = models.Blog.__table__
+
+def add_compression_columns(engine: Engine):
+    """Add the compressed content columns and allow plain content to be NULL.
+
+    Does nothing once the columns exist, so it is cheap to run on every start.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("blogs")}
+    if {"content_compressed", "content_codec"} <= columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE blogs ADD COLUMN IF NOT EXISTS content_compressed BYTEA"))
+        conn.execute(text("ALTER TABLE blogs ADD COLUMN IF NOT EXISTS content_codec VARCHAR(8)"))
+        conn.execute(text("ALTER TABLE blogs ALTER COLUMN content DROP NOT NULL"))
+
+def add_change_feed_index(engine: Engine, batch_size: int = 500):
+    """Index blogs for the change feed and backfill updated_at for rows never updated"""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE blogs ALTER COLUMN updated_at SET DEFAULT now()"))
+    while True:
+        with engine.begin() as conn:
+            updated = conn.execute(text(
+                "UPDATE blogs SET updated_at = created_at WHERE id IN "
+                "(SELECT id FROM blogs WHERE updated_at IS NULL LIMIT :batch_size)"
+            ), {"batch_size": batch_size}).rowcount
+        if not updated:
+            break
+        logger.info(f"Backfilled updated_at for {updated} blogs")
+    # CONCURRENTLY can't run inside a transaction, and avoids blocking writes
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_blogs_updated_at_id ON blogs (updated_at, id)"
+        ))
+
+def compress_existing_content(engine: Engine, batch_size: int = 500) -> int:
+    """Compress plain content above the configured threshold, one batch per transaction"""
+    converted = 0
+    last_id = 0
+    stmt = (
+        update(blogs)
+        .where(blogs.c.id == bindparam("_id"))
+        .values(
+            content=bindparam("_content"),
+            content_compressed=bindparam("_compressed"),
+            content_codec=bindparam("_codec"),
+            # A storage change, not an edit: keep it out of the change feed
+            updated_at=blogs.c.updated_at,
+        )
+    )
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(blogs.c.id, blogs.c.content)
+                .where(blogs.c.id > last_id, blogs.c.content.isnot(None))
+                .order_by(blogs.c.id)
+                .limit(batch_size)
+                # Hold the rows until the batch commits, so API edits can't be overwritten
+                .with_for_update()
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            params = []
+            for row in rows:
+                plain, compressed, codec = compression.compress(row.content)
+                if compressed is not None:
+                    params.append({"_id": row.id, "_content": plain, "_compressed": compressed, "_codec": codec})
+            if params:
+                conn.execute(stmt, params)
+                converted += len(params)
+        logger.info(f"Compressed {converted} blogs so far (last id {last_id})")
+    return converted
+
+def decompress_existing_content(engine: Engine, batch_size: int = 500) -> int:
+    """Move compressed content back to the plain text column"""
+    converted = 0
+    last_id = 0
+    stmt = (
+        update(blogs)
+        .where(blogs.c.id == bindparam("_id"))
+        .values(
+            content=bindparam("_content"),
+            content_compressed=None,
+            content_codec=None,
+            updated_at=blogs.c.updated_at,
+        )
+    )
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(blogs.c.id, blogs.c.content_compressed, blogs.c.content_codec)
+                .where(blogs.c.id > last_id, blogs.c.content_compressed.isnot(None))
+                .order_by(blogs.c.id)
+                .limit(batch_size)
+                # Hold the rows until the batch commits, so API edits can't be overwritten
+                .with_for_update()
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            conn.execute(stmt, [
+                {"_id": row.id, "_content": compression.decompress(row.content_compressed, row.content_codec)}
+                for row in rows
+            ])
+            converted += len(rows)
+        logger.info(f"Decompressed {converted} blogs so far (last id {last_id})")
+    return converted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the blog database")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--decompress", action="store_true", help="Store all content as plain text again")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    models.Base.metadata.create_all(bind=engine)
+    add_compression_columns(engine)
+    add_change_feed_index(engine, batch_size=args.batch_size)
+    if args.decompress:
+        count = decompress_existing_content(engine, batch_size=args.batch_size)
+    else:
+        count = compress_existing_content(engine, batch_size=args.batch_size)
+    logger.info(f"Done, {count} blogs converted")
@@ -1,18 +1,59 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 
+import compression
+
 Base = declarative_base()
 
 class Blog(Base):
     __tablename__ = "blogs"
+    # Keyset index for the change feed, ordered by (updated_at, id)
+    __table_args__ = (Index("ix_blogs_updated_at_id", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
-    content = Column(Text, nullable=False)
+    # Plain content; NULL when the post is stored compressed in content_compressed
+    content_text = Column("content", Text, nullable=True)
+    content_compressed = Column(LargeBinary, nullable=True)
+    content_codec = Column(String(8), nullable=True)
     summary = Column(String, nullable=True)
     is_published = Column(Boolean, default=False)
     author_id = Column(Integer, nullable=False)  # References user ID from accounts service
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too, so new posts show up in the change feed. default= as well
+    # as server_default=: tables created before the feed have no DB default
+    updated_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
     published_at = Column(DateTime(timezone=True), nullable=True)
+
+    @hybrid_property
+    def content(self) -> str:
+        """Blog content, decompressed on first access"""
+        if self.content_compressed is None:
+            return self.content_text
+        cached = getattr(self, "_content_cache", None)
+        if cached is not None and cached[0] is self.content_compressed:
+            return cached[1]
+        text = compression.decompress(self.content_compressed, self.content_codec)
+        self._content_cache = (self.content_compressed, text)
+        return text
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self.content_text, self.content_compressed, self.content_codec = compression.compress(value)
+        self._content_cache = None
+
+    @content.expression
+    def content(cls):
+        # SQL can only see plain content; compressed posts never match filters on it
+        return cls.content_text
+
+class BlogTombstone(Base):
+    """Record of a deleted blog, so the change feed can report deletes"""
+    __tablename__ = "blog_tombstones"
+    __table_args__ = (Index("ix_blog_tombstones_deleted_at_blog_id", "deleted_at", "blog_id"),)
+
+    id = Column(Integer, primary_key=True)
+    blog_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
 
 class BlogBase(BaseModel):
@@ -37,3 +37,26 @@ class BlogPublic(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BlogChange(BaseModel):
+    """A blog created, updated, published or deleted after the cursor"""
+    id: int
+    op: Literal["upsert", "delete"]
+    changed_at: datetime
+    blog: Optional[Blog] = None
+
+class BlogChanges(BaseModel):
+    changes: list[BlogChange]
+    # Pass back as `since` to get the next changes
+    cursor: Optional[str] = None
+
+class BlogBatchAction(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+    action: Literal["publish", "unpublish", "delete"]
+
+class BlogBatchResult(BaseModel):
+    id: int
+    status: Literal["published", "unpublished", "deleted", "unchanged", "not_found"]
+
+class BlogBatchResponse(BaseModel):
+    results: list[BlogBatchResult]
@@ -0,0 +1,32 @@
+# Blog Service
+"""Background jobs run after blog writes commit"""
+import logging
+from typing import List
+
+from common import jobs
+
+logger = logging.getLogger(__name__)
+
+QUEUE = "blog"
+
+@jobs.job("blog.changed", queue=QUEUE)
+def blog_changed(blog_id: int):
+    """Log that a blog was created, updated or deleted.
+
+    This is the only thing it does so far. It runs on the worker after every
+    committed blog write, which is where cache or search updates belong.
+    """
+    logger.info(f"Blog {blog_id} changed")
+
+@jobs.job("blogs.changed", queue=QUEUE)
+def blogs_changed(blog_ids: List[int]):
+    """blog_changed for every blog touched by one batch action"""
+    for blog_id in blog_ids:
+        blog_changed(blog_id)
+
+def blog_changed_on_commit(db, blog_id: int):
+    jobs.on_commit(db, "blog.changed", {"blog_id": blog_id}, idempotency_key=f"blog.changed:{blog_id}")
+
+def blogs_changed_on_commit(db, blog_ids: List[int]):
+    # One job per batch rather than per blog, so a batch costs one Redis round trip
+    jobs.on_commit(db, "blogs.changed", {"blog_ids": list(blog_ids)})
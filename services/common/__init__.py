@@ -0,0 +1 @@
+# Shared service utilities
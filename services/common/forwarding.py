@@ -0,0 +1,41 @@
+"""Client address of a request that may have come through reverse proxies.
+
+The address is worked out once, by the first proxy the client connects to
+(the ingress controller, or the gateway when it is reached directly), and
+passed on in X-Real-IP, which each proxy overwrites. X-Real-IP is only
+believed when the connection comes from TRUSTED_PROXY_CIDRS; anyone else
+could put any address in it. Counting X-Forwarded-For hops instead breaks as
+soon as clients can reach a service along paths of different lengths.
+"""
+import ipaddress
+import os
+from typing import List, Union
+
+from fastapi import Request
+
+# Configuration
+# Networks of the proxies allowed to set X-Real-IP (the ingress controller and
+# gateway pods, i.e. the cluster's pod CIDR). Empty trusts nobody.
+TRUSTED_PROXY_CIDRS = os.getenv("TRUSTED_PROXY_CIDRS", "")
+
+HEADER = "X-Real-IP"
+
+def _parse_networks(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(cidr.strip(), strict=False) for cidr in value.split(",") if cidr.strip()]
+
+TRUSTED_NETWORKS = _parse_networks(TRUSTED_PROXY_CIDRS)
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_NETWORKS)
+
+def client_ip(request: Request) -> str:
+    """X-Real-IP when a trusted proxy sent the request, otherwise the connecting address"""
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get(HEADER.lower(), "").strip()
+    if forwarded and is_trusted_proxy(peer):
+        return forwarded
+    return peer
@@ -0,0 +1,263 @@
+"""Lightweight background job queue for post-write side effects.
+
+Jobs are queued in Redis and executed by a worker process
+(``python -m common.worker`` from each service's directory). When Redis is not configured or unreachable they run on a
+background thread in the enqueuing process instead.
+
+    @jobs.job("blog.changed", queue="blog")
+    def blog_changed(blog_id: int):
+        ...
+
+    jobs.on_commit(db, "blog.changed", {"blog_id": 1}, idempotency_key="blog.changed:1")
+"""
+import json
+import logging
+import os
+import queue as queue_module
+import random
+import signal
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from common.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "300"))
+# How long an idempotency key suppresses duplicates of a job that has not started yet
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("JOB_IDEMPOTENCY_TTL_SECONDS", "3600"))
+
+KEY_PREFIX = "jobs"
+
+# Claim the idempotency key (when there is one) and queue the job in one atomic
+# step, so a failure can't leave the key set for a job that was never queued
+_ENQUEUE_SCRIPT = """
+if ARGV[3] ~= '' and not redis.call('SET', KEYS[2], ARGV[2], 'NX', 'EX', ARGV[3]) then
+    return 0
+end
+redis.call('LPUSH', KEYS[1], ARGV[1])
+return 1
+"""
+
+class JobHandler:
+    def __init__(self, name: str, queue: str, func: Callable[..., Any]):
+        self.name = name
+        self.queue = queue
+        self.func = func
+
+_handlers: Dict[str, JobHandler] = {}
+
+def job(name: str, queue: str = "default"):
+    """Register a function as the handler for jobs called `name`"""
+    def decorator(func: Callable[..., Any]):
+        _handlers[name] = JobHandler(name, queue, func)
+        return func
+    return decorator
+
+def _queue_key(queue: str) -> str:
+    return f"{KEY_PREFIX}:{queue}"
+
+def _delayed_key(queue: str) -> str:
+    return f"{KEY_PREFIX}:{queue}:delayed"
+
+def _dead_key(queue: str) -> str:
+    return f"{KEY_PREFIX}:{queue}:dead"
+
+def _idempotency_key(key: str) -> str:
+    return f"{KEY_PREFIX}:idempotency:{key}"
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given (1-based) failed attempt"""
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+def enqueue(
+    name: str,
+    payload: Optional[dict] = None,
+    idempotency_key: Optional[str] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> Optional[str]:
+    """Queue a job and return its id, or None if a job with the same idempotency key is still waiting to run"""
+    handler = _handlers.get(name)
+    if handler is None:
+        raise KeyError(f"No handler registered for job '{name}'")
+
+    job_data = {
+        "id": uuid.uuid4().hex,
+        "name": name,
+        "queue": handler.queue,
+        "payload": payload or {},
+        "attempt": 0,
+        "max_attempts": max_attempts,
+        "idempotency_key": idempotency_key,
+    }
+
+    r = get_redis()
+    if r is not None:
+        try:
+            queued = r.eval(
+                _ENQUEUE_SCRIPT,
+                2,
+                _queue_key(handler.queue),
+                _idempotency_key(idempotency_key) if idempotency_key else "",
+                json.dumps(job_data),
+                job_data["id"],
+                IDEMPOTENCY_TTL_SECONDS if idempotency_key else "",
+            )
+            return job_data["id"] if queued else None
+        except redis.RedisError as e:
+            logger.warning(f"Running job {name} in-process, Redis is unavailable: {e}")
+
+    if idempotency_key and not _local.claim(idempotency_key):
+        return None
+    _local.put(job_data)
+    return job_data["id"]
+
+# Enqueue after commit
+
+def on_commit(db: Session, name: str, payload: Optional[dict] = None, idempotency_key: Optional[str] = None):
+    """Enqueue a job once the session's current transaction commits.
+
+    Jobs are dropped if the transaction rolls back, so side effects never run
+    for writes that did not happen.
+    """
+    db.info.setdefault("pending_jobs", []).append((name, payload, idempotency_key))
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending_jobs(session: Session):
+    for name, payload, idempotency_key in session.info.pop("pending_jobs", []):
+        try:
+            enqueue(name, payload, idempotency_key=idempotency_key)
+        except Exception as e:
+            # The write already committed; a lost side effect must not fail the request
+            logger.error(f"Failed to enqueue job {name}: {e}")
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_jobs(session: Session):
+    session.info.pop("pending_jobs", None)
+
+# Execution
+
+def run_job(
+    job_data: dict,
+    retry: Callable[[dict, float], None],
+    dead: Callable[[dict], None],
+    release: Callable[[str], None],
+):
+    """Run one job, scheduling a retry with backoff or giving up when it fails"""
+    # Release the key before running, so writes that land while the job is
+    # running queue a fresh job instead of being coalesced into this one
+    if job_data.get("idempotency_key"):
+        release(job_data["idempotency_key"])
+
+    handler = _handlers.get(job_data["name"])
+    if handler is None:
+        logger.error(f"No handler registered for job '{job_data['name']}', dropping {job_data['id']}")
+        dead(job_data)
+        return
+
+    try:
+        handler.func(**job_data["payload"])
+    except Exception as e:
+        job_data["attempt"] += 1
+        if job_data["attempt"] < job_data["max_attempts"]:
+            delay = backoff_delay(job_data["attempt"])
+            logger.warning(
+                f"Job {job_data['name']} ({job_data['id']}) failed on attempt "
+                f"{job_data['attempt']}, retrying in {delay:.1f}s: {e}"
+            )
+            retry(job_data, delay)
+            return
+        logger.error(f"Job {job_data['name']} ({job_data['id']}) failed permanently: {e}")
+        dead(job_data)
+
+class LocalQueue:
+    """In-process fallback used when Redis is unavailable"""
+
+    def __init__(self):
+        self.jobs: "queue_module.Queue[dict]" = queue_module.Queue()
+        self.claimed: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    def claim(self, key: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            expires = self.claimed.get(key)
+            if expires is not None and expires > now:
+                return False
+            self.claimed[key] = now + IDEMPOTENCY_TTL_SECONDS
+            return True
+
+    def release(self, key: str):
+        with self.lock:
+            self.claimed.pop(key, None)
+
+    def put(self, job_data: dict):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="jobs-local", daemon=True)
+                self.thread.start()
+        self.jobs.put(job_data)
+
+    def _retry(self, job_data: dict, delay: float):
+        timer = threading.Timer(delay, self.jobs.put, args=(job_data,))
+        timer.daemon = True
+        timer.start()
+
+    def _dead(self, job_data: dict):
+        pass
+
+    def _run(self):
+        while True:
+            run_job(self.jobs.get(), retry=self._retry, dead=self._dead, release=self.release)
+
+_local = LocalQueue()
+
+def _promote_due_jobs(r, queue: str):
+    """Move delayed retries whose time has come back onto the queue"""
+    for member in r.zrangebyscore(_delayed_key(queue), "-inf", time.time(), start=0, num=100):
+        # Only the worker that removes the job re-queues it
+        if r.zrem(_delayed_key(queue), member):
+            r.lpush(_queue_key(queue), member)
+
+def run_worker(queue: str = "default"):
+    """Process jobs from a Redis queue until SIGINT/SIGTERM"""
+    r = get_redis()
+    if r is None:
+        raise RuntimeError("The job worker requires Redis; set REDIS_URL")
+
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *args: stopping.set())
+
+    def retry(job_data: dict, delay: float):
+        r.zadd(_delayed_key(queue), {json.dumps(job_data): time.time() + delay})
+
+    def dead(job_data: dict):
+        r.lpush(_dead_key(queue), json.dumps(job_data))
+
+    def release(key: str):
+        try:
+            r.delete(_idempotency_key(key))
+        except redis.RedisError as e:
+            # Only delays new jobs for this key until the TTL runs out
+            logger.warning(f"Failed to release idempotency key {key}: {e}")
+
+    logger.info(f"Job worker started on queue '{queue}'")
+    while not stopping.is_set():
+        _promote_due_jobs(r, queue)
+        item = r.brpop(_queue_key(queue), timeout=1)
+        if item is None:
+            continue
+        run_job(json.loads(item[1]), retry=retry, dead=dead, release=release)
+    logger.info(f"Job worker on queue '{queue}' stopped")
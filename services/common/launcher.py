@@ -0,0 +1,188 @@
+"""Production server launcher shared by the gateway and the services.
+
+Runs an app in N uvicorn worker processes sharing one listening socket, using
+uvloop and httptools. Workers are recycled after a configurable number of
+requests to bound memory growth, and a worker that exits for any other reason
+is replaced, with a growing delay while workers keep crashing on startup.
+SIGINT/SIGTERM drain in-flight requests before exiting.
+
+    if __name__ == "__main__":
+        from common import launcher
+        launcher.run("main:app", port=8001)
+"""
+import logging
+import math
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from typing import List
+
+import uvicorn
+
+logger = logging.getLogger("uvicorn.error")
+
+# Workers are started fresh (not forked) and receive the listening socket by pickling
+multiprocessing.allow_connection_pickling()
+_spawn = multiprocessing.get_context("spawn")
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring a container CPU limit (cgroup v2)"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+# Configuration
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Longer than the 60s idle timeout of typical load balancers, so the balancer
+# closes idle connections first and never reuses one we have just closed
+KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "75"))
+GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# Recycle a worker after this many requests (0 disables), plus up to JITTER
+# more so workers don't all restart at once
+MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+# A worker that dies within RESPAWN_MIN_UPTIME seconds counts as a fast failure;
+# respawns back off exponentially and the launcher exits after
+# MAX_FAST_FAILURES of them in a row, rather than crash-looping forever
+RESPAWN_MIN_UPTIME = float(os.getenv("SERVER_RESPAWN_MIN_UPTIME", "10"))
+RESPAWN_BACKOFF_MAX = float(os.getenv("SERVER_RESPAWN_BACKOFF_MAX", "30"))
+MAX_FAST_FAILURES = int(os.getenv("SERVER_MAX_FAST_FAILURES", "5"))
+# Single process with auto-reload, for local development only
+RELOAD = os.getenv("SERVER_RELOAD", "false").lower() == "true"
+
+def _config(app: str, host: str, port: int, factory: bool = False) -> uvicorn.Config:
+    max_requests = None
+    if MAX_REQUESTS > 0:
+        max_requests = MAX_REQUESTS + random.randint(0, MAX_REQUESTS_JITTER)
+    return uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEP_ALIVE,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        limit_max_requests=max_requests,
+        factory=factory,
+    )
+
+def respawn_delay(fast_failures: int) -> float:
+    """Seconds to wait before replacing a worker after the given number of fast failures"""
+    return min(0.5 * (2 ** (fast_failures - 1)), RESPAWN_BACKOFF_MAX)
+
+def _serve(config: uvicorn.Config, sockets: List):
+    """Worker process entry point"""
+    config.configure_logging()
+    uvicorn.Server(config).run(sockets=sockets)
+
+class Supervisor:
+    """Keeps `workers` uvicorn processes running on a shared socket"""
+
+    def __init__(self, app: str, host: str, port: int, workers: int, factory: bool = False):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.factory = factory
+        # None while a slot waits out its respawn delay
+        self.processes: List = []
+        self.started_at: List[float] = []
+        self.respawn_at: List[float] = []
+        self.fast_failures = 0
+        self.exit_code = 0
+        self.should_exit = threading.Event()
+
+    def spawn(self):
+        config = _config(self.app, self.host, self.port, self.factory)
+        process = _spawn.Process(target=_serve, kwargs={"config": config, "sockets": [self.socket]})
+        process.start()
+        return process
+
+    def signal_handler(self, sig, frame):
+        self.should_exit.set()
+
+    def run(self):
+        self.socket = _config(self.app, self.host, self.port, self.factory).bind_socket()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.signal_handler)
+
+        logger.info(f"Starting {self.workers} workers for {self.app} on {self.host}:{self.port}")
+        now = time.monotonic()
+        self.processes = [self.spawn() for _ in range(self.workers)]
+        self.started_at = [now] * self.workers
+        self.respawn_at = [0.0] * self.workers
+
+        while not self.should_exit.wait(timeout=0.5):
+            self.check_workers(time.monotonic())
+
+        self.shutdown()
+        return self.exit_code
+
+    def check_workers(self, now: float):
+        """Replace exited workers, backing off while they keep failing fast"""
+        for i, process in enumerate(self.processes):
+            if process is None:
+                if now >= self.respawn_at[i]:
+                    self.processes[i] = self.spawn()
+                    self.started_at[i] = now
+                continue
+            if process.is_alive():
+                continue
+
+            # Recycled after MAX_REQUESTS, or crashed
+            if process.exitcode == 0 or now - self.started_at[i] >= RESPAWN_MIN_UPTIME:
+                self.fast_failures = 0
+                logger.info(f"Worker {process.pid} exited with code {process.exitcode}, replacing it")
+                self.processes[i] = self.spawn()
+                self.started_at[i] = now
+                continue
+
+            self.fast_failures += 1
+            if self.fast_failures >= MAX_FAST_FAILURES:
+                logger.error(f"Workers failed {self.fast_failures} times in a row right after starting, giving up")
+                self.exit_code = 1
+                self.should_exit.set()
+                return
+            delay = respawn_delay(self.fast_failures)
+            logger.warning(
+                f"Worker {process.pid} exited with code {process.exitcode} after "
+                f"{now - self.started_at[i]:.1f}s, replacing it in {delay:.1f}s"
+            )
+            self.processes[i] = None
+            self.respawn_at[i] = now + delay
+
+    def shutdown(self):
+        # SIGTERM makes each worker stop accepting and finish in-flight requests
+        processes = [process for process in self.processes if process is not None]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=GRACEFUL_TIMEOUT + 5)
+            if process.is_alive():
+                logger.warning(f"Worker {process.pid} did not stop in time, killing it")
+                process.kill()
+        self.socket.close()
+        logger.info("All workers stopped")
+
+def run(app: str, port: int, host: str = "0.0.0.0", workers: int = WORKERS, factory: bool = False):
+    """Serve `app` (an import string such as "main:app") until SIGINT/SIGTERM.
+
+    With `factory`, `app` names a function that builds the app in each worker.
+    """
+    if RELOAD:
+        uvicorn.run(app, host=host, port=port, reload=True, factory=factory)
+        return
+    exit_code = Supervisor(app, host, port, max(workers, 1), factory).run()
+    if exit_code:
+        sys.exit(exit_code)
@@ -0,0 +1,37 @@
+import logging
+import os
+import time
+from typing import Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REDIS_URL = os.getenv("REDIS_URL")
+# How long to wait before trying an unreachable Redis again
+RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", "30"))
+
+_client: Optional[redis.Redis] = None
+_next_attempt = 0.0
+
+def get_redis() -> Optional[redis.Redis]:
+    """Return a shared Redis client, or None when Redis is not configured or unreachable.
+
+    Callers are expected to fall back to in-process state when this returns None.
+    """
+    global _client, _next_attempt
+    if _client is not None or not REDIS_URL:
+        return _client
+
+    now = time.monotonic()
+    if now < _next_attempt:
+        return None
+    try:
+        client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+        client.ping()
+        _client = client
+    except redis.RedisError as e:
+        logger.warning(f"Redis unavailable at {REDIS_URL}, using in-process fallback: {e}")
+        _next_attempt = now + RETRY_SECONDS
+    return _client
@@ -0,0 +1,15 @@
+"""Job worker entry point, run from a service's directory:
+
+    python -m common.worker
+
+Imports that service's tasks module, which registers its job handlers and
+names the queue to consume.
+"""
+import logging
+
+from common import jobs
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    import tasks
+    jobs.run_worker(tasks.QUEUE)
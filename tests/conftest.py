@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Gateway and service modules import each other by module name, as they do
+# inside the containers where each app directory is the working directory
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "gateway"))
+sys.path.insert(0, os.path.join(ROOT, "services"))
@@ -0,0 +1,213 @@
+import importlib
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+BLOG_DIR = os.path.join(os.path.dirname(__file__), "..", "services", "blog")
+BLOG_MODULES = [f[:-3] for f in os.listdir(BLOG_DIR) if f.endswith(".py")]
+
+@pytest.fixture
+def blog(tmp_path, monkeypatch):
+    """The blog service's modules on a fresh sqlite database, removed again afterwards"""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'blog.db'}")
+    monkeypatch.syspath_prepend(BLOG_DIR)
+    saved = {name: sys.modules.pop(name) for name in BLOG_MODULES if name in sys.modules}
+    try:
+        importlib.import_module("main")
+        yield SimpleNamespace(**{name: sys.modules[name] for name in BLOG_MODULES if name in sys.modules})
+    finally:
+        for name in BLOG_MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+@pytest.fixture
+def db(blog):
+    session = blog.database.SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def zlib_compression(blog, monkeypatch):
+    monkeypatch.setattr(blog.compression, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(blog.compression, "CONTENT_COMPRESSION_THRESHOLD", 100)
+
+def test_compression_round_trip(blog, zlib_compression):
+    text = "All work and no play makes Jack a dull boy. " * 50
+    plain, compressed, codec = blog.compression.compress(text)
+    assert plain is None and codec == "zlib"
+    assert len(compressed) < len(text)
+    assert blog.compression.decompress(compressed, codec) == text
+
+def test_content_below_threshold_stays_plain(blog, zlib_compression):
+    assert blog.compression.compress("short post") == ("short post", None, None)
+
+def test_compression_disabled_keeps_plain(blog):
+    text = "x" * 10000
+    assert blog.compression.compress(text) == (text, None, None)
+
+def test_content_setter_compresses_and_reads_back(blog, db, zlib_compression):
+    text = "Lorem ipsum dolor sit amet. " * 100
+    post = blog.models.Blog(title="Long", content=text, author_id=1)
+    db.add(post)
+    db.commit()
+    assert post.content_text is None and post.content_codec == "zlib"
+
+    db.expire_all()
+    assert db.get(blog.models.Blog, post.id).content == text
+
+    post.content = "now short"
+    db.commit()
+    db.expire_all()
+    stored = db.get(blog.models.Blog, post.id)
+    assert (stored.content_text, stored.content_compressed, stored.content_codec) == ("now short", None, None)
+    assert stored.content == "now short"
+
+def test_content_filters_in_sql(blog, db):
+    db.add(blog.models.Blog(title="Hello", content="needle", author_id=1))
+    db.commit()
+    Blog = blog.models.Blog
+    assert [b.title for b in db.query(Blog).filter(Blog.content == "needle")] == ["Hello"]
+    assert db.query(Blog).filter(Blog.content == "missing").count() == 0
+
+def test_gateway_identity_skips_token_verification(blog, db):
+    from fastapi.testclient import TestClient
+    from common import identity
+
+    for title in ("one", "two", "three"):
+        db.add(blog.models.Blog(title=title, content="...", author_id=1))
+    db.commit()
+
+    # No accounts service is running, so only the signed identity can authenticate this
+    client = TestClient(blog.main.app)
+    headers = {"Authorization": "Bearer token", identity.HEADER: identity.sign({"id": 1, "is_admin": True})}
+    response = client.get("/blogs/?ids=1&ids=3", headers=headers)
+    assert response.status_code == 200
+    assert sorted(b["title"] for b in response.json()) == ["one", "three"]
+
+    headers[identity.HEADER] = "forged.signature"
+    assert client.get("/blogs/", headers=headers).status_code == 401
+    headers[identity.HEADER] = "forged.sïgnature".encode()
+    assert client.get("/blogs/", headers=headers).status_code == 401
+
+def test_insert_sets_updated_at_without_db_default(blog):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+
+    # The blogs table as it was before the change feed: no default on updated_at
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE blogs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, content TEXT, "
+            "content_compressed BLOB, content_codec VARCHAR(8), summary VARCHAR, is_published BOOLEAN, "
+            "author_id INTEGER NOT NULL, created_at DATETIME, updated_at DATETIME, published_at DATETIME)"
+        ))
+    with Session(engine) as db:
+        db.add(blog.models.Blog(title="new", content="...", author_id=1))
+        db.commit()
+        assert db.query(blog.models.Blog).one().updated_at is not None
+
+def add_changes(blog, db, *changes):
+    """Add blogs (title, seconds ago) and tombstones (None, seconds ago) with fixed timestamps"""
+    now = datetime.utcnow()
+    ids = []
+    for blog_id, (title, seconds_ago) in enumerate(changes, start=1):
+        at = now - timedelta(seconds=seconds_ago)
+        if title is None:
+            db.add(blog.models.BlogTombstone(blog_id=100 + blog_id, deleted_at=at))
+            ids.append(100 + blog_id)
+        else:
+            post = blog.models.Blog(id=blog_id, title=title, content="...", author_id=1, updated_at=at)
+            db.add(post)
+            ids.append(blog_id)
+    db.commit()
+    return ids
+
+def test_changes_merge_updates_and_deletes_in_order(blog, db):
+    first, deleted, last = add_changes(blog, db, ("first", 30), (None, 20), ("last", 10))
+    changes = blog.crud.get_changes(db)
+    assert [(blog_id, post is None) for _, blog_id, post in changes] == [
+        (first, False), (deleted, True), (last, False),
+    ]
+
+def test_changes_page_with_cursor(blog, db):
+    ids = add_changes(blog, db, ("a", 40), ("b", 30), (None, 20), ("c", 10))
+    page = blog.crud.get_changes(db, limit=2)
+    assert [change[1] for change in page] == ids[:2]
+
+    cursor = blog.crud.decode_cursor(blog.crud.encode_cursor(page[-1][0], page[-1][1]))
+    assert cursor == (page[-1][0], page[-1][1])
+    assert [change[1] for change in blog.crud.get_changes(db, since=cursor, limit=10)] == ids[2:]
+
+def test_recent_changes_wait_to_settle(blog, db):
+    old, recent = add_changes(blog, db, ("old", 30), ("recent", 1.5))
+    page = blog.crud.get_changes(db, settle_seconds=3)
+    assert [change[1] for change in page] == [old]
+
+    # A write that commits late lands after the cursor instead of behind it
+    cursor = (page[-1][0], page[-1][1])
+    assert [change[1] for change in blog.crud.get_changes(db, since=cursor)] == [recent]
+
+def test_invalid_cursor(blog):
+    from fastapi.testclient import TestClient
+    from common import identity
+
+    with pytest.raises(ValueError):
+        blog.crud.decode_cursor("not-a-cursor")
+
+    client = TestClient(blog.main.app)
+    headers = {"Authorization": "Bearer token", identity.HEADER: identity.sign({"id": 1, "is_admin": True})}
+    response = client.get("/blogs/changes?since=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+def test_batch_reports_status_per_id(blog, db, monkeypatch):
+    from common import jobs
+
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", lambda name, payload=None, **kwargs: queued.append((name, payload)))
+    db.add_all([
+        blog.models.Blog(id=1, title="draft", content="...", author_id=1, is_published=False),
+        blog.models.Blog(id=2, title="live", content="...", author_id=1, is_published=True),
+    ])
+    db.commit()
+
+    results = blog.crud.batch_update_blogs(db, [1, 2, 1, 99], "publish")
+    assert results == [(1, "published"), (2, "unchanged"), (99, "not_found")]
+    assert queued == [("blogs.changed", {"blog_ids": [1]})]
+
+    db.expire_all()
+    assert db.get(blog.models.Blog, 1).is_published
+
+def test_batch_delete_writes_tombstones(blog, db, monkeypatch):
+    from common import jobs
+
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", lambda name, payload=None, **kwargs: queued.append((name, payload)))
+    db.add_all([blog.models.Blog(id=i, title=f"post {i}", content="...", author_id=1) for i in (1, 2, 3)])
+    db.commit()
+
+    results = blog.crud.batch_update_blogs(db, [3, 1, 404], "delete")
+    assert results == [(3, "deleted"), (1, "deleted"), (404, "not_found")]
+    assert [b.id for b in db.query(blog.models.Blog)] == [2]
+    assert sorted(t.blog_id for t in db.query(blog.models.BlogTombstone)) == [1, 3]
+    assert len(queued) == 1 and sorted(queued[0][1]["blog_ids"]) == [1, 3]
+
+def test_migration_keeps_updated_at(blog, db, monkeypatch):
+    text = "Lorem ipsum dolor sit amet. " * 100
+    last_edit = datetime(2020, 1, 1)
+    db.add(blog.models.Blog(id=1, title="Old", content=text, author_id=1, updated_at=last_edit))
+    db.commit()
+
+    monkeypatch.setattr(blog.compression, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(blog.compression, "CONTENT_COMPRESSION_THRESHOLD", 100)
+    assert blog.migrate.compress_existing_content(blog.database.engine) == 1
+    db.expire_all()
+    stored = db.get(blog.models.Blog, 1)
+    assert stored.content_codec == "zlib" and stored.updated_at == last_edit
+
+    assert blog.migrate.decompress_existing_content(blog.database.engine) == 1
+    db.expire_all()
+    stored = db.get(blog.models.Blog, 1)
+    assert stored.content_text == text and stored.updated_at == last_edit
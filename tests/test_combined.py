@@ -0,0 +1,48 @@
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import routing
+
+@pytest.fixture
+def combined_client(tmp_path, monkeypatch):
+    """Client for a combined app on fresh sqlite databases, undoing its global changes afterwards"""
+    monkeypatch.setenv("ACCOUNTS_DATABASE_URL", f"sqlite:///{tmp_path / 'accounts.db'}")
+    monkeypatch.setenv("BLOG_DATABASE_URL", f"sqlite:///{tmp_path / 'blog.db'}")
+    monkeypatch.setattr(routing, "TRANSPORT_MOUNTS", {})
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    saved_modules = set(sys.modules)
+    try:
+        import combined
+        yield TestClient(combined.create_app())
+    finally:
+        # The gateway's main, combined itself and the isolated service modules
+        for name in set(sys.modules) - saved_modules:
+            if name in ("main", "combined") or name.startswith(("accounts_service.", "blog_service.")):
+                del sys.modules[name]
+
+def test_health_reaches_services_in_process(combined_client):
+    response = combined_client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["services"] == {"accounts": True, "blog": True}
+
+def test_signup_login_and_list_blogs_in_process(combined_client):
+    # No accounts or blog server is listening; every hop goes through ASGI transports
+    user = {"email": "admin@example.com", "full_name": "Admin", "password": "s3cret-pass"}
+    assert combined_client.post("/auth/signup", json=user).status_code == 200
+
+    accounts_db = sys.modules["accounts_service.database"].SessionLocal()
+    accounts_models = sys.modules["accounts_service.models"]
+    accounts_db.query(accounts_models.User).update({"is_admin": True})
+    accounts_db.commit()
+    accounts_db.close()
+
+    # The proxy passes upstream bodies through as JSON strings
+    response = combined_client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+    token = json.loads(response.json())["access_token"]
+
+    response = combined_client.get("/blogs/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert json.loads(response.json()) == []
@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from gateway.main import app
 
@@ -23,6 +23,24 @@ def test_health_check(mock_client):
     response = client.get("/health")
     assert response.status_code == 200
 
+def test_token_verify_and_health_release_upstreams():
+    import httpx
+    import routing
+
+    async def failing_get(url, **kwargs):
+        raise httpx.ConnectError("instance down")
+
+    with patch("httpx.AsyncClient") as mock_client:
+        mock_client.return_value.__aenter__.return_value.get = failing_get
+        client.get("/health")
+        client.get("/aggregates/dashboard", headers={"Authorization": "Bearer token"})
+
+    instances = [u for pool in routing.get_route_table().pools.values() for u in pool.instances]
+    assert all(u.outstanding == 0 for u in instances)
+    assert any(u.failures for u in instances)
+    for upstream in instances:
+        upstream.failures = 0
+
 def test_auth_proxy_route_exists():
     # Test that auth routes are properly set up (even if they fail without backend)
     response = client.post("/auth/signup")
@@ -40,3 +58,189 @@ def test_blogs_proxy_route_exists():
     response = client.get("/blogs/")
     # Should get a connection error or similar, not a 404
     assert response.status_code != 404
+
+def test_unknown_route_returns_404():
+    response = client.get("/unknown/path")
+    assert response.status_code == 404
+
+def test_route_table_matches_longest_prefix():
+    import routing
+    table = routing.build_route_table({
+        "pools": {"accounts": ["http://a:8001"], "blog": ["http://b:8002"]},
+        "routes": {"/blogs": "blog", "/blogs/admin": "accounts"},
+    })
+    assert table.match("/blogs").name == "blog"
+    assert table.match("/blogs/1").name == "blog"
+    assert table.match("/blogs/admin/x").name == "accounts"
+    assert table.match("/blogsx") is None
+
+def test_pool_prefers_least_outstanding_and_ejects_failing():
+    import routing
+    pool = routing.Pool("blog", [routing.Upstream("http://b1"), routing.Upstream("http://b2")])
+    busy, idle = pool.instances
+    busy.outstanding = 5
+    assert pool.pick() is idle
+
+    for _ in range(routing.EJECT_AFTER_FAILURES):
+        idle.start()
+        idle.finish(ok=False)
+    assert pool.pick() is busy
+
+def test_route_table_reload_keeps_instance_state():
+    import routing
+    config = {"pools": {"blog": ["http://b1"]}, "routes": {"/blogs": "blog"}}
+    table = routing.build_route_table(config)
+    table.pool("blog").instances[0].outstanding = 2
+
+    config["pools"]["blog"].append("http://b2")
+    reloaded = routing.build_route_table(config, previous=table)
+    assert [u.outstanding for u in reloaded.pool("blog").instances] == [2, 0]
+
+def test_dashboard_requires_token():
+    response = client.get("/aggregates/dashboard")
+    assert response.status_code == 401
+
+def test_dashboard_returns_partial_results():
+    import httpx
+    from common import identity
+    from gateway.main import get_current_user
+
+    seen = []
+
+    async def fake_get(url, headers=None, params=None):
+        seen.append(identity.verify(headers.get(identity.HEADER)))
+        if url.endswith("/users/me"):
+            return httpx.Response(200, json={"id": 1, "email": "admin@example.com"})
+        if params.get("ids"):
+            raise httpx.ConnectError("blog instance down")
+        return httpx.Response(200, json=[{"id": 7}])
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1, "is_admin": True}
+    try:
+        with patch("httpx.AsyncClient") as mock_client:
+            mock_client.return_value.__aenter__.return_value.get = fake_get
+            response = client.get(
+                "/aggregates/dashboard?blog_ids=7&blog_ids=8",
+                headers={"Authorization": "Bearer token"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["data"]["me"]["id"] == 1
+    assert data["data"]["blogs"] == [{"id": 7}]
+    assert data["errors"]["blog_details"]["status_code"] == 502
+    # One call for all blog details, each carrying the identity verified by the gateway
+    assert seen == [{"id": 1, "is_admin": True}] * 3
+
+def test_dashboard_caps_blog_ids():
+    import aggregates
+    from gateway.main import get_current_user
+
+    query = "&".join(f"blog_ids={i}" for i in range(aggregates.MAX_DASHBOARD_BLOGS + 1))
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1, "is_admin": True}
+    try:
+        response = client.get(f"/aggregates/dashboard?{query}", headers={"Authorization": "Bearer token"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+
+def test_verified_identity_rejects_tampering_and_expiry(monkeypatch):
+    from common import identity
+
+    value = identity.sign({"id": 1, "is_admin": False})
+    assert identity.verify(value) == {"id": 1, "is_admin": False}
+
+    signature = value.partition(".")[2]
+    forged = identity.sign({"id": 1, "is_admin": True}).partition(".")[0]
+    assert identity.verify(f"{forged}.{signature}") is None
+    assert identity.verify(None) is None
+
+    monkeypatch.setattr(identity, "TTL_SECONDS", -1)
+    assert identity.verify(identity.sign({"id": 1})) is None
+
+def test_verified_identity_rejects_malformed_values():
+    import base64
+    from common import identity
+
+    assert identity.verify("body.sïgnature") is None
+    assert identity.verify("bödy.signature") is None
+    # Correctly signed, but not an identity payload
+    for payload in (b"[1, 2]", b'{"user": "admin", "exp": 9999999999}'):
+        body = base64.urlsafe_b64encode(payload).decode()
+        assert identity.verify(f"{body}.{identity._signature(body)}") is None
+
+def test_long_poll_gets_longer_timeout_and_does_not_eject():
+    import httpx
+    import routing
+    from gateway.main import PROXY_TIMEOUT
+
+    timeouts = []
+
+    async def slow_request(method, url, timeout=None, **kwargs):
+        timeouts.append(timeout)
+        raise httpx.ReadTimeout("no changes yet")
+
+    with patch("httpx.AsyncClient") as mock_client:
+        mock_client.return_value.__aenter__.return_value.request = slow_request
+        for _ in range(routing.EJECT_AFTER_FAILURES):
+            response = client.get("/blogs/changes?wait=30")
+            assert response.status_code == 504
+
+    assert timeouts[0].read == pytest.approx(PROXY_TIMEOUT + 30)
+    blog_pool = routing.get_route_table().pool(routing.BLOG_POOL)
+    assert all(u.failures == 0 and u.ejected_until == 0 for u in blog_pool.instances)
+
+def test_feed_timeouts_without_wait_still_count_as_failures():
+    import httpx
+    import routing
+
+    errors = iter([httpx.ConnectTimeout("unreachable"), httpx.ReadTimeout("stuck")])
+
+    async def failing_request(method, url, **kwargs):
+        raise next(errors)
+
+    blog_pool = routing.get_route_table().pool(routing.BLOG_POOL)
+    with patch("httpx.AsyncClient") as mock_client:
+        mock_client.return_value.__aenter__.return_value.request = failing_request
+        assert client.get("/blogs/changes?wait=30").status_code == 504
+        assert client.get("/blogs/changes").status_code == 504
+
+    assert sum(u.failures for u in blog_pool.instances) == 2
+    for upstream in blog_pool.instances:
+        upstream.failures = 0
+
+def test_cancelled_proxy_request_releases_upstream():
+    import asyncio
+    import routing
+    from gateway import main
+
+    async def cancelled(*args, **kwargs):
+        raise asyncio.CancelledError()
+
+    request = Mock()
+    request.url.path = "/blogs/1"
+    request.query_params = {}
+    with patch.object(main, "proxy_request", cancelled):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(main.gateway_proxy(request, "blogs/1"))
+
+    blog_pool = routing.get_route_table().pool(routing.BLOG_POOL)
+    assert all(u.outstanding == 0 and u.failures == 0 for u in blog_pool.instances)
+
+def test_proxy_overwrites_client_supplied_real_ip():
+    import httpx
+
+    sent = {}
+
+    async def record_request(method, url, headers=None, **kwargs):
+        sent.update(headers)
+        return httpx.Response(200, json={})
+
+    with patch("httpx.AsyncClient") as mock_client:
+        mock_client.return_value.__aenter__.return_value.request = record_request
+        client.get("/blogs/public/", headers={"X-Real-IP": "203.0.113.99"})
+
+    # The test client isn't a trusted proxy, so its own address is passed on
+    assert sent["x-real-ip"] == "testclient"
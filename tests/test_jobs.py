@@ -0,0 +1,75 @@
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from common import jobs
+
+# No REDIS_URL in tests, so jobs run on the in-process fallback queue
+engine = create_engine("sqlite://")
+TestingSessionLocal = sessionmaker(bind=engine)
+
+calls = []
+done = threading.Event()
+
+@jobs.job("test.record")
+def record(value: str):
+    calls.append(value)
+    done.set()
+
+attempts = []
+retried = threading.Event()
+
+@jobs.job("test.flaky")
+def flaky():
+    attempts.append(1)
+    if len(attempts) < 2:
+        raise RuntimeError("temporary failure")
+    retried.set()
+
+def run_and_wait(func):
+    calls.clear()
+    done.clear()
+    func()
+    done.wait(timeout=5)
+
+def test_enqueue_runs_job():
+    run_and_wait(lambda: jobs.enqueue("test.record", {"value": "direct"}))
+    assert calls == ["direct"]
+
+def test_on_commit_runs_after_commit_only():
+    db = TestingSessionLocal()
+    db.execute(text("SELECT 1"))
+    jobs.on_commit(db, "test.record", {"value": "rolled back"})
+    db.rollback()
+
+    jobs.on_commit(db, "test.record", {"value": "committed"})
+    run_and_wait(db.commit)
+    db.close()
+    assert calls == ["committed"]
+
+def test_idempotency_key_suppresses_pending_duplicate():
+    jobs._local.claim("test.record:1")
+    assert jobs.enqueue("test.record", {"value": "dup"}, idempotency_key="test.record:1") is None
+    jobs._local.release("test.record:1")
+    assert jobs.enqueue("test.record", {"value": "dup"}, idempotency_key="test.record:1") is not None
+
+def test_failed_job_is_retried(monkeypatch):
+    monkeypatch.setattr(jobs, "BACKOFF_BASE_SECONDS", 0.01)
+    jobs.enqueue("test.flaky")
+    assert retried.wait(timeout=5)
+    assert len(attempts) == 2
+
+def test_enqueue_falls_back_when_redis_errors(monkeypatch):
+    import redis
+    from unittest.mock import Mock
+
+    broken = Mock()
+    broken.eval.side_effect = redis.TimeoutError("timed out")
+    monkeypatch.setattr(jobs, "get_redis", lambda: broken)
+    run_and_wait(lambda: jobs.enqueue("test.record", {"value": "fallback"}, idempotency_key="test.record:fallback"))
+    assert calls == ["fallback"]
+    # Claiming the key and queueing are one Redis call, so a failure leaves no key behind
+    broken.set.assert_not_called()
+    run_and_wait(lambda: jobs.enqueue("test.record", {"value": "again"}, idempotency_key="test.record:fallback"))
+    assert calls == ["again"]
@@ -0,0 +1,52 @@
+from unittest.mock import Mock
+
+from common import launcher
+
+def make_supervisor(monkeypatch, workers=1):
+    supervisor = launcher.Supervisor("main:app", "127.0.0.1", 0, workers)
+    spawned = []
+
+    def spawn():
+        process = Mock()
+        process.is_alive.return_value = False
+        process.exitcode = 1
+        spawned.append(process)
+        return process
+
+    monkeypatch.setattr(supervisor, "spawn", spawn)
+    supervisor.processes = [spawn() for _ in range(workers)]
+    supervisor.started_at = [0.0] * workers
+    supervisor.respawn_at = [0.0] * workers
+    return supervisor, spawned
+
+def test_respawn_delay_grows_and_is_capped():
+    assert launcher.respawn_delay(1) == 0.5
+    assert launcher.respawn_delay(3) == 2.0
+    assert launcher.respawn_delay(100) == launcher.RESPAWN_BACKOFF_MAX
+
+def test_crashing_worker_is_respawned_after_backoff(monkeypatch):
+    supervisor, spawned = make_supervisor(monkeypatch)
+    supervisor.check_workers(now=1.0)
+    assert supervisor.processes == [None]
+
+    supervisor.check_workers(now=1.2)
+    assert len(spawned) == 1
+    supervisor.check_workers(now=1.5)
+    assert len(spawned) == 2
+
+def test_gives_up_after_repeated_fast_failures(monkeypatch):
+    monkeypatch.setattr(launcher, "MAX_FAST_FAILURES", 3)
+    supervisor, spawned = make_supervisor(monkeypatch)
+    now = 1.0
+    while not supervisor.should_exit.is_set():
+        supervisor.check_workers(now)
+        now += 1.0
+    assert supervisor.exit_code == 1
+    assert len(spawned) == 3
+
+def test_worker_that_ran_a_while_resets_failures(monkeypatch):
+    supervisor, spawned = make_supervisor(monkeypatch)
+    supervisor.fast_failures = 2
+    supervisor.check_workers(now=launcher.RESPAWN_MIN_UPTIME + 1)
+    assert supervisor.fast_failures == 0
+    assert len(spawned) == 2
@@ -0,0 +1,43 @@
+from unittest.mock import Mock
+
+from accounts import throttle
+from common import forwarding
+
+def make_request(client_host, real_ip=None):
+    request = Mock()
+    request.client.host = client_host
+    request.headers = {"x-real-ip": real_ip} if real_ip else {}
+    return request
+
+def test_client_ip_trusts_real_ip_from_proxies_only(monkeypatch):
+    monkeypatch.setattr(forwarding, "TRUSTED_NETWORKS", forwarding._parse_networks("10.244.0.0/16"))
+    assert forwarding.client_ip(make_request("10.244.1.7", "203.0.113.7")) == "203.0.113.7"
+    assert forwarding.client_ip(make_request("10.244.1.7")) == "10.244.1.7"
+    # A client reaching the service directly can't choose its own address
+    assert forwarding.client_ip(make_request("198.51.100.4", "203.0.113.7")) == "198.51.100.4"
+
+def test_client_ip_trusts_nobody_by_default(monkeypatch):
+    monkeypatch.setattr(forwarding, "TRUSTED_NETWORKS", [])
+    assert forwarding.client_ip(make_request("10.0.0.2", "203.0.113.7")) == "10.0.0.2"
+
+def test_email_locked_after_max_failures():
+    email = "victim@example.com"
+    for i in range(throttle.MAX_FAILURES_PER_EMAIL - 1):
+        throttle.record_failure(email, f"198.51.100.{i}")
+    assert throttle.locked_for(email, "198.51.100.99") is None
+
+    throttle.record_failure(email, "198.51.100.50")
+    assert 0 < throttle.locked_for(email, "198.51.100.99") <= throttle.LOCKOUT_BASE_SECONDS
+
+def test_lockout_grows_exponentially():
+    assert throttle.lockout_seconds(1) == throttle.LOCKOUT_BASE_SECONDS
+    assert throttle.lockout_seconds(3) == throttle.LOCKOUT_BASE_SECONDS * 4
+    assert throttle.lockout_seconds(100) == throttle.LOCKOUT_MAX_SECONDS
+
+def test_success_resets_email_failures():
+    email = "user@example.com"
+    for _ in range(throttle.MAX_FAILURES_PER_EMAIL - 1):
+        throttle.record_failure(email, "192.0.2.1")
+    throttle.record_success(email)
+    throttle.record_failure(email, "192.0.2.1")
+    assert throttle.locked_for(email, "192.0.2.2") is None